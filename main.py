@@ -10,6 +10,30 @@ main.py
     sent to a psuedo-API endpoint running on a Django app
     on a webserver.
 
+    * New in version 1.3
+    ====================
+        Readings waiting to be sent to the server are stored in a
+        binary file of fixed-size records instead of a CSV file,
+        which roughly halves what is written to the SD card. Any
+        readings left in the CSV file by an older version are moved
+        over to it when the script starts.
+
+        An optional `poll_interval` setting in the TOML configuration
+        file keeps the script running and takes a set of readings
+        every `poll_interval` seconds. Without it, the script takes
+        a single set of readings and exits, as before.
+        While polling, the readings are stored and sent from a
+        background thread, so a slow server doesn't hold up the
+        next read from the energy meter.
+
+        Backlogged readings are uploaded to the server as CSV files
+        of up to 500 rows each to the `/api/bulk/` endpoint, instead
+        of one request per row. If the server does not provide that
+        endpoint, the script falls back to sending the rows one at
+        a time, and remembers that for a day across runs. Readings the server turns down as invalid (HTTP 400
+        or 422) are logged and dropped, rather than holding up every
+        reading after them.
+
     * New in version 1.2c
     =====================
         Integrated a TOML configuration file, so vital details, such
@@ -53,20 +77,32 @@ main.py
 """
 
 import os
+import atexit
 import sys
 import csv
 import requests
 import time
 import logging
+import mmap
+import queue
 import tomllib
 import minimalmodbus
 import serial
+import signal
 import socket
-from minimalmodbus import IllegalRequestError
+import struct
+import threading
+from minimalmodbus import ModbusException
 from serial import SerialException
-from requests import ConnectionError, Timeout
+from requests import ConnectionError, RequestException, Timeout
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+from typing import NamedTuple
 from logging.handlers import RotatingFileHandler
 
+logger = logging.getLogger(__name__)
+
 # DECLARE CONSTANTS HERE
 # ======================
 
@@ -74,24 +110,225 @@ REGISTER_LIST = [99, 101, 103, 113, 115, 117, 121, 123, 125, 127, 129, 131,
                 133, 135, 137, 141, 143, 145, 149, 151, 153, 157, 159, 161,
                 177, 179, 181, 183, 185, 187, 223, 223]
 
-PARAMETER_NAME_LIST = ['timestamp', 'r_vtg', 'y_vtg', 'b_vtg', 'r_curr',
-                        'y_curr', 'b_curr', 'r_active_curr', 'y_active_curr',
-                        'b_active_curr', 'r_reactive_curr', 'y_reactive_curr',
-                        'b_reactive_curr', 'r_pf', 'y_pf', 'b_pf',
-                        'r_active_pwr', 'y_active_pwr', 'b_active_pwr',
-                        'r_react_pwr', 'y_react_pwr', 'b_react_pwr',
-                        'r_apparent_pwr', 'y_apparent_pwr', 'b_apparent_pwr',
-                        'r_vtg_thd', 'y_vtg_thd', 'b_vtg_thd', 'r_curr_thd',
-                        'y_curr_thd', 'b_curr_thd', 'abs_active_energy',
-                        'total_energy_imp', 'phase_imbalance',
-                        'meter_id', 'ip_address']
+# Registers that lie this close together (in 16-bit registers)
+# are fetched in a single request, reading through the gap.
+MAX_REGISTER_GAP = 2
+
+# The Modbus specification caps a single "read holding
+# registers" request at 125 registers.
+MAX_BLOCK_LENGTH = 125
+
+# Time (in seconds) to wait for the energy meter to answer a request.
+SERIAL_TIMEOUT = 0.5
+
+# Time (in seconds) to wait after the serial connection to the
+# energy meter fails, before exiting or, while polling, retrying.
+SERIAL_RETRY_SECONDS = 10
+
+# Pre-compiled layouts for decoding a pair of registers
+# into an IEEE 754 single precision float.
+REGISTER_PAIR_STRUCT = struct.Struct('>HH')
+FLOAT_STRUCT = struct.Struct('>f')
 
+class Reading(NamedTuple):
+    """ One set of readings from the energy meter, in the
+    order of the columns sent to the server. The register
+    values are in the same order as `REGISTER_LIST`.
+    """
+    timestamp: str
+    r_vtg: float
+    y_vtg: float
+    b_vtg: float
+    r_curr: float
+    y_curr: float
+    b_curr: float
+    r_active_curr: float
+    y_active_curr: float
+    b_active_curr: float
+    r_reactive_curr: float
+    y_reactive_curr: float
+    b_reactive_curr: float
+    r_pf: float
+    y_pf: float
+    b_pf: float
+    r_active_pwr: float
+    y_active_pwr: float
+    b_active_pwr: float
+    r_react_pwr: float
+    y_react_pwr: float
+    b_react_pwr: float
+    r_apparent_pwr: float
+    y_apparent_pwr: float
+    b_apparent_pwr: float
+    r_vtg_thd: float
+    y_vtg_thd: float
+    b_vtg_thd: float
+    r_curr_thd: float
+    y_curr_thd: float
+    b_curr_thd: float
+    abs_active_energy: float
+    total_energy_imp: float
+    phase_imbalance: float
+    meter_id: int
+    ip_address: str
+
+PARAMETER_NAME_LIST = list(Reading._fields)
+
+# The fields of `Reading` that hold a register value, in the
+# same order as `REGISTER_LIST`.
+REGISTER_FIELDS = Reading._fields[Reading._fields.index('timestamp') + 1:
+                                  Reading._fields.index('phase_imbalance')]
+
+# Just the register values of a set of readings, as they come from the
+# energy meter, before the rest of the `Reading` can be filled in.
+RegisterValues = NamedTuple('RegisterValues', [(field, float) for field in REGISTER_FIELDS])
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Every row has the same fixed set of columns, and none of the values
+# contain commas or quotes, so the rows are written out with a pre-built
+# format string rather than going through `csv.DictWriter`.
+CSV_HEADER = ','.join(PARAMETER_NAME_LIST) + '\n'
+CSV_ROW_FORMAT = ','.join(['{}'] * len(PARAMETER_NAME_LIST)) + '\n'
+
+# The backlog is uploaded to the server as a CSV file with this name.
+# Older versions of this script also kept the backlog on disk in it.
 CSV_FILE_NAME = 'energy_meter_readings.csv'
 
+# Readings that are yet to be sent to the server are kept in a binary
+# file of fixed-size records: the time of the readings (in seconds since
+# the epoch), the register values and the phase imbalance as 32-bit floats,
+# the meter ID, and the IP address padded out to 16 bytes.
+BACKLOG_FILE_NAME = 'energy_meter_readings.bin'
+BACKLOG_RECORD_STRUCT = struct.Struct('<d%dfI16s' % (len(REGISTER_FIELDS) + 1))
+
+# Size of the write buffer for the backlog file. While the server can't
+# be reached, records wait in the buffer until it fills up or the script
+# exits, instead of going to the SD card one by one.
+BACKLOG_BUFFER_SIZE = 65536
+
 LOG_FILE_NAME = 'rpi_energy_meter.log'
 
+# How long (in seconds) the IP address of the
+# Raspberry Pi is cached by `get_ip()`.
+IP_CACHE_SECONDS = 300
+
+# Limits (in seconds) on how long to wait before trying
+# to reach the server again after it could not be reached.
+SERVER_BACKOFF_MIN = 3
+SERVER_BACKOFF_MAX = 60
+
+# (connect, read) timeouts in seconds for requests to the server.
+HTTP_TIMEOUT = (2, 5)
+
+# A bulk upload carries many readings, so it gets
+# a more generous read timeout.
+BULK_HTTP_TIMEOUT = (2, 30)
+
+# The most backlogged readings sent to the bulk endpoint in one request.
+BULK_UPLOAD_SIZE = 500
+
+# Created when the server turns out not to have the bulk upload endpoint,
+# so that later runs go straight to sending row by row. The endpoint is
+# tried again once the file is older than `BULK_RETRY_SECONDS`, in case
+# the server has been updated since.
+BULK_UNAVAILABLE_FILE_NAME = 'bulk_upload_unavailable'
+BULK_RETRY_SECONDS = 86400
+
+# Statuses with which the server turns down the readings themselves, such
+# as a register value it can't store. Sending the same readings again
+# won't change the answer, so they are dropped from the backlog.
+REJECTED_STATUS_CODES = (400, 422)
+
+# Options set on every socket used to talk to the server. urllib3
+# already turns on TCP_NODELAY by default; keep-alive is added to it.
+# Left to the kernel defaults, the first keep-alive probe is only sent
+# after two hours, so a connection is probed after 60 idle seconds,
+# every 10 seconds, and given up on after 3 unanswered probes.
+SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+]
+for keepalive_option, keepalive_value in (('TCP_KEEPIDLE', 60),
+                                          ('TCP_KEEPINTVL', 10),
+                                          ('TCP_KEEPCNT', 3)):
+    if hasattr(socket, keepalive_option):
+        SOCKET_OPTIONS.append((socket.IPPROTO_TCP, getattr(socket, keepalive_option), keepalive_value))
+
+# While polling, readings are handed over to the uploader thread
+# through a queue that holds at most this many sets of readings.
+UPLOAD_QUEUE_SIZE = 1024
+
+# The uploader sends at most this many sets of readings at a time,
+# waiting at most this long (in seconds) for a batch to fill up.
+UPLOAD_BATCH_SIZE = 100
+UPLOAD_BATCH_SECONDS = 0.5
+
 loop_counter = 0
 
+# Set from `check_bulk_upload()` when the script starts, and cleared
+# if the server turns out not to have the bulk upload endpoint.
+bulk_upload_supported = True
+
+# The connection to the energy meter, created by `get_instrument()`
+# on first use and dropped again if the serial port fails.
+meter_instrument = None
+
+# The current wait between attempts to reach the server, and the
+# `time.monotonic()` time before which it won't be tried again.
+server_backoff = 0
+server_retry_time = 0.0
+
+# Held by whichever thread is working on the backlog file.
+backlog_lock = threading.Lock()
+
+# The backlog file, opened by `get_backlog_file()` on first use and
+# then kept open, so that while polling it isn't re-opened for every
+# batch of readings.
+backlog_handle = None
+
+# The last IP address found by `get_ip()`, and when it was found.
+ip_cache = {'value': None, 'timestamp': 0.0}
+
+class KeepAliveAdapter(HTTPAdapter):
+    """ An HTTP adapter whose connections to the server have
+    Nagle's algorithm turned off (TCP_NODELAY), so small requests
+    are not held back waiting for the previous one to be
+    acknowledged, and TCP keep-alive probes turned on, so an idle
+    pooled connection that has gone stale is dropped within about
+    90 seconds instead of failing the next request.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        """ Creates the connection pool manager with the socket
+        options in `SOCKET_OPTIONS` applied to every connection.
+
+        Parameters:
+        ===========
+            *args, **kwargs
+            Passed on to `HTTPAdapter.init_poolmanager()`.
+
+        Returns:
+        ========
+            None
+        """
+        kwargs['socket_options'] = SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+# A single session is shared by every request to the server, so the
+# TCP/TLS connection is set up once and then kept alive and reused
+# instead of being re-established for each row that is sent.
+# The retries only cover failing to connect. POST isn't one of the
+# methods urllib3 retries once a request has gone out, and retrying an
+# upload the server may already have stored would duplicate rows.
+SESSION = requests.Session()
+http_adapter = KeepAliveAdapter(pool_connections = 1,
+                                pool_maxsize = 4,
+                                max_retries = Retry(total = 3,
+                                                    backoff_factor = 0.5))
+SESSION.mount('http://', http_adapter)
+SESSION.mount('https://', http_adapter)
+atexit.register(SESSION.close)
+
 def load_toml():
     """ Opens the TOML file containing vital configuration
     details and stores them in a dictionary that can be
@@ -111,46 +348,88 @@ def load_toml():
         config = tomllib.load(toml_config)
     return config
 
-def convert_mantissa(mantissa_str: str) -> int:
-    """ Given a string consisting of binary digits,
-    converts them into a proper decimal number.
-    The positional power of 2 is calculated for each
-    bit and then multipled with that bit.
-    Similar to the manual method of converting
-    binary numbers into decimal numbers.
+def group_registers(register_list: list) -> list:
+    """ Groups the register addresses into contiguous blocks
+    so that each block can be fetched from the energy meter
+    with a single Modbus request, instead of one request
+    per parameter.
+    Each parameter occupies two 16-bit registers. Small gaps
+    of unused registers between parameters are read through
+    rather than starting a new block.
 
-    Paramters:
-    ==========
-        mantissa_str: str
-        A string consisting of zeroes and ones
-        representing a binary number.
+    Parameters:
+    ===========
+        register_list: list
+        A list containing the starting register address
+        of each parameter to be read.
 
     Returns:
     ========
-        mantissa_int: int
-        The decimal equivalent of the binary
-        number represented by the argument string.
+        register_blocks: list
+        A list of (start_address, register_count) tuples,
+        one per Modbus request to be made.
     """
-    power_count = -1
-    mantissa_int = 0
-    for element in mantissa_str:
-        mantissa_int += (int(element) * pow(2, power_count))
-        power_count -= 1
-    return mantissa_int + 1
+    register_blocks = []
+    for register in sorted(set(register_list)):
+        if register_blocks:
+            start_address, register_count = register_blocks[-1]
+            gap = register - (start_address + register_count)
+            block_length = register + 2 - start_address
+            if gap <= MAX_REGISTER_GAP and block_length <= MAX_BLOCK_LENGTH:
+                register_blocks[-1] = (start_address, block_length)
+                continue
+        register_blocks.append((register, 2))
+    return register_blocks
+
+def locate_registers(register_list: list, register_blocks: list) -> list:
+    """ Finds where each parameter's registers sit among the
+    blocks fetched from the energy meter, so the values can
+    be picked out without searching the blocks every time.
+
+    Parameters:
+    ===========
+        register_list: list
+        A list containing the starting register address
+        of each parameter to be read.
+
+        register_blocks: list
+        The (start_address, register_count) tuples, as
+        returned by `group_registers()`.
+
+    Returns:
+    ========
+        register_offsets: list
+        A list of (block_index, offset) tuples, one per
+        parameter in `register_list`, giving the block its
+        registers are in and where in the block they start.
+    """
+    register_offsets = []
+    for register in register_list:
+        for block_index, (start_address, register_count) in enumerate(register_blocks):
+            offset = register - start_address
+            if 0 <= offset < register_count:
+                register_offsets.append((block_index, offset))
+                break
+    return register_offsets
+
+REGISTER_BLOCKS = group_registers(REGISTER_LIST)
+REGISTER_OFFSETS = locate_registers(REGISTER_LIST, REGISTER_BLOCKS)
 
 def convert_to_decimal(register_value: list) -> float:
     """ Converts the 32-bit binary number obtained from a register
     into a floating-point decimal number. 
-    This is done by using the conversion method specified by the
-    IEEE Standard for Floating-Point Arithmetic (IEEE 754).
+    The two 16-bit halves are packed back into four bytes (the
+    meter sends the low half first) and decoded as a single
+    precision float as specified by the IEEE Standard for
+    Floating-Point Arithmetic (IEEE 754).
     Read more here: https://en.wikipedia.org/wiki/IEEE_754
 
     Parameters:
     ===========
         register_value: list
         A list containing two elements, each of which
-        is a 16-character string representing
-        one half of the total 32-bit binary number.
+        is a 16-bit integer representing one half
+        of the total 32-bit binary number.
 
     Returns:
     ========
@@ -158,21 +437,52 @@ def convert_to_decimal(register_value: list) -> float:
         The value of the parameter present in the register
         in a decimal floating-point value.
     """
-    parameter_value = []
-    parameter_value.append('{0:016b}'.format(register_value[0]))
-    parameter_value.append('{0:016b}'.format(register_value[1]))
-    binary_string = parameter_value[1] + parameter_value[0]
-    sign_bit = int(binary_string[0])
-    exponent = int(binary_string[1:9], 2)
-    exponent -= 127
-    mantissa_binary = binary_string[9:]
-    mantissa_decimal = convert_mantissa(mantissa_binary)
-    decimal_number = pow(-1, sign_bit) * (mantissa_decimal) * pow(2, exponent)
+    register_bytes = REGISTER_PAIR_STRUCT.pack(register_value[1], register_value[0])
+    decimal_number = FLOAT_STRUCT.unpack(register_bytes)[0]
     return decimal_number
 
+def get_instrument(METER_ID: int) -> minimalmodbus.Instrument:
+    """ Returns the connection to the energy meter, creating
+    and configuring it the first time around. The serial port
+    is then kept open and reused for every set of readings,
+    rather than being re-opened and re-configured each time.
+
+    Parameters:
+    ===========
+        METER_ID: int
+        The Modbus ID of the energy meter to which each
+        Raspberry Pi is connected.
+
+    Returns:
+    ========
+        meter_instrument: minimalmodbus.Instrument
+        The configured connection to the energy meter.
+    """
+    global meter_instrument
+
+    if meter_instrument is None:
+        # Let's specify the connection parameters to connect to the
+        # energy meter and then configure it.
+        meter_instrument = minimalmodbus.Instrument('/dev/ttyUSB0', METER_ID, minimalmodbus.MODE_RTU)
+        meter_instrument.serial.baudrate = 9600
+        meter_instrument.serial.bytesize = 8
+        meter_instrument.serial.parity = serial.PARITY_NONE
+        meter_instrument.serial.stopbits = 2
+        # Even the largest block of registers comes back well within
+        # half a second at 9600 baud. Each response is then read in
+        # one go, without waiting between individual bytes.
+        meter_instrument.serial.timeout = SERIAL_TIMEOUT
+        meter_instrument.serial.inter_byte_timeout = None
+        # Keep the serial port open between requests, rather than
+        # opening and closing it around every single one.
+        meter_instrument.close_port_after_each_call = False
+    return meter_instrument
+
 def get_ip() -> str:
     """ A helper function that returns the IP address
     of the host machine this script is running on.
+    The address is cached for `IP_CACHE_SECONDS`, so the
+    socket is only created again once that has run out.
     
     Parameters:
     ===========
@@ -185,6 +495,10 @@ def get_ip() -> str:
         Pi. If the function failed, it returns `127.0.0.1` as a
         default failsafe.
     """
+    cache_age = time.monotonic() - ip_cache['timestamp']
+    if ip_cache['value'] is not None and cache_age < IP_CACHE_SECONDS:
+        return ip_cache['value']
+
     ip_address = ''
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     sock.settimeout(0)
@@ -195,74 +509,600 @@ def get_ip() -> str:
         ip_address = '127.0.0.1'
     finally:
         sock.close()
+
+    # Don't hold on to the failsafe address, so the
+    # next call tries to find the real one again.
+    if ip_address != '127.0.0.1':
+        ip_cache['value'] = ip_address
+        ip_cache['timestamp'] = time.monotonic()
     return ip_address
 
-def clear_csv(file_name: str, column_names: list):
-    """ Given the name of a CSV file
-    and a list of the column names,
-    truncates the contents and re-adds
-    the column names to the now empty file.
+def get_backlog_file():
+    """ Returns the open backlog file, opening it first if
+    it isn't open yet. The file is opened for appending as
+    well as reading, and kept open for as long as the script
+    runs, rather than being re-opened for every set of readings.
+    Must be called with `backlog_lock` held.
+
+    Parameters:
+    ===========
+        None
+
+    Returns:
+    ========
+        backlog_handle: file object
+        The backlog file, opened in binary mode for
+        both reading and writing.
+    """
+    global backlog_handle
+
+    if backlog_handle is None:
+        backlog_handle = open(BACKLOG_FILE_NAME, 'a+b', buffering = BACKLOG_BUFFER_SIZE)
+        align_backlog(backlog_handle)
+    return backlog_handle
+
+def close_backlog_file():
+    """ Writes out any buffered records and closes the backlog
+    file, if it is open. Registered to run when the script
+    exits, including when it is stopped with a SIGTERM.
+
+    Parameters:
+    ===========
+        None
+
+    Returns:
+    ========
+        None
+    """
+    global backlog_handle
+
+    with backlog_lock:
+        if backlog_handle is not None:
+            backlog_handle.flush()
+            os.fsync(backlog_handle.fileno())
+            backlog_handle.close()
+            backlog_handle = None
+
+atexit.register(close_backlog_file)
+
+def count_backlog(backlog_file) -> int:
+    """ Returns the number of whole records in the backlog file.
+
+    Parameters:
+    ===========
+        backlog_file: file object
+        The backlog file, opened in binary mode for
+        both reading and writing.
+
+    Returns:
+    ========
+        record_count: int
+        The number of records in the file. A record that
+        was cut short is not counted.
+    """
+    backlog_file.flush()
+    file_size = os.fstat(backlog_file.fileno()).st_size
+    record_count = file_size // BACKLOG_RECORD_STRUCT.size
+    return record_count
+
+def pack_reading(time_epoch: float, reading: Reading) -> bytes:
+    """ Packs a set of readings into a record for
+    the backlog file.
+
+    Parameters:
+    ===========
+        time_epoch: float
+        The time the readings were taken, in seconds
+        since the epoch.
+
+        reading: Reading
+        The set of readings.
+
+    Returns:
+    ========
+        record: bytes
+        The readings packed with `BACKLOG_RECORD_STRUCT`.
+    """
+    return BACKLOG_RECORD_STRUCT.pack(time_epoch,
+                                      *[getattr(reading, field) for field in REGISTER_FIELDS],
+                                      reading.phase_imbalance,
+                                      reading.meter_id,
+                                      reading.ip_address.encode())
+
+def read_backlog(backlog_file, first_record: int, record_count: int) -> list:
+    """ Reads up to `record_count` records from the backlog
+    file, starting at record number `first_record`, and turns
+    each of them back into a `Reading`.
+    The file is memory-mapped and the records unpacked
+    straight from it.
+
+    Parameters:
+    ===========
+        backlog_file: file object
+        The backlog file, opened in binary mode for
+        both reading and writing.
+
+        first_record: int
+        The number of the first record to read, counting
+        from 0 at the start of the file.
+
+        record_count: int
+        The most records to read.
+
+    Returns:
+    ========
+        backlog_rows: list
+        A list of `Reading` objects, one per record.
+    """
+    backlog_rows = []
+    last_record = min(first_record + record_count, count_backlog(backlog_file))
+    if last_record <= first_record:
+        return backlog_rows
+
+    start_offset = first_record * BACKLOG_RECORD_STRUCT.size
+    end_offset = last_record * BACKLOG_RECORD_STRUCT.size
+    # The records are unpacked through a view of the mapping rather than
+    # a slice of it, which would copy them first. The view has to be
+    # released before the mapping can be closed.
+    with mmap.mmap(backlog_file.fileno(), 0, access = mmap.ACCESS_READ) as backlog_map, \
+         memoryview(backlog_map) as backlog_view:
+        for record in BACKLOG_RECORD_STRUCT.iter_unpack(backlog_view[start_offset:end_offset]):
+            time_epoch, *register_values, phase_imbalance, meter_id, ip_address = record
+            time_now = time.strftime(TIMESTAMP_FORMAT, time.localtime(time_epoch))
+            ip_address = ip_address.rstrip(b'\0').decode(errors = 'replace')
+            backlog_rows.append(Reading(timestamp = time_now,
+                                        **dict(zip(REGISTER_FIELDS, register_values)),
+                                        phase_imbalance = phase_imbalance,
+                                        meter_id = meter_id,
+                                        ip_address = ip_address))
+    return backlog_rows
+
+def align_backlog(backlog_file):
+    """ Cuts off a record that was only partly written to
+    the backlog file, in case the script was stopped part
+    way through writing it. Otherwise every record added
+    after it would be out of line with the record size.
+
+    Parameters:
+    ===========
+        backlog_file: file object
+        The backlog file, opened in binary mode for
+        both reading and writing.
+
+    Returns:
+    ========
+        None
+    """
+    backlog_file.flush()
+    file_size = os.fstat(backlog_file.fileno()).st_size
+    partial_size = file_size % BACKLOG_RECORD_STRUCT.size
+    if partial_size:
+        logger.warning("BACKLOG_TRUNCATED: Dropped %d bytes of an incomplete record.", partial_size)
+        backlog_file.truncate(file_size - partial_size)
+
+def clear_backlog(record_count: int):
+    """ Removes the first `record_count` records from the
+    backlog file, once they have been sent to the server.
+    If nothing is left after them, the open file is simply
+    emptied. Otherwise the remaining records are written to
+    a temporary file, which is only swapped in once it is
+    safely on disk, so a power cut part way through can't
+    lose them. The old file is then closed, and the new one
+    is opened the next time it's needed.
+    Must be called with `backlog_lock` held.
+
+    Parameters:
+    ===========
+        record_count: int
+        The number of records to remove from the start
+        of the file.
+
+    Returns:
+    ========
+        None
+    """
+    global backlog_handle
+
+    backlog_file = get_backlog_file()
+    if record_count >= count_backlog(backlog_file):
+        backlog_file.seek(0)
+        backlog_file.truncate()
+        return
+
+    temp_file_name = BACKLOG_FILE_NAME + '.tmp'
+    backlog_file.seek(record_count * BACKLOG_RECORD_STRUCT.size)
+    with open(temp_file_name, 'wb') as temp_file:
+        temp_file.write(backlog_file.read())
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+    os.replace(temp_file_name, BACKLOG_FILE_NAME)
+    backlog_file.close()
+    backlog_handle = None
+
+def migrate_csv_backlog():
+    """ Moves any readings left in the CSV file by an older
+    version of this script over to the backlog file, and
+    then removes the CSV file.
+    The new backlog file is put together under a temporary
+    name and only swapped in once it is complete, so an
+    interrupted migration can simply be run again. Rows
+    that can't be read, such as a last line cut short by
+    a power cut, are skipped.
 
     Parameters:
     ===========
-        file_name: str
-        The name of the CSV file, present in
-        the same directory as this script.
+        None
+
+    Returns:
+    ========
+        None
+    """
+    if not os.path.exists(CSV_FILE_NAME):
+        return
+
+    temp_file_name = BACKLOG_FILE_NAME + '.tmp'
+    with open(temp_file_name, 'wb') as temp_file:
+        # Start off with the records already in the backlog file,
+        # leaving out any record that was only partly written.
+        if os.path.exists(BACKLOG_FILE_NAME):
+            with open(BACKLOG_FILE_NAME, 'rb') as backlog_file:
+                backlog_bytes = backlog_file.read()
+            records_size = len(backlog_bytes) - (len(backlog_bytes) % BACKLOG_RECORD_STRUCT.size)
+            temp_file.write(backlog_bytes[:records_size])
+
+        with open(CSV_FILE_NAME, 'r', encoding = "utf-8") as csv_file:
+            reader_object = csv.DictReader(csv_file)
+            for row in reader_object:
+                try:
+                    time_epoch = time.mktime(time.strptime(row['timestamp'], TIMESTAMP_FORMAT))
+                    reading = Reading(timestamp = row['timestamp'],
+                                      **{field: float(row[field]) for field in REGISTER_FIELDS},
+                                      phase_imbalance = float(row['phase_imbalance']),
+                                      meter_id = int(row['meter_id']),
+                                      ip_address = row['ip_address'])
+                    record = pack_reading(time_epoch, reading)
+                except (KeyError, TypeError, ValueError, AttributeError):
+                    logger.warning("MIGRATION_SKIPPED_ROW: Could not read line %d of %s.",
+                                   reader_object.line_num, CSV_FILE_NAME)
+                    continue
+                temp_file.write(record)
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
 
-        column_names: list
-        A list containing the column names
-        to be added to the CSV file after
-        truncation.
+    os.replace(temp_file_name, BACKLOG_FILE_NAME)
+    os.remove(CSV_FILE_NAME)
+
+def handle_sigterm(signal_number, stack_frame):
+    """ Turns a SIGTERM (sent when the service is stopped)
+    into a regular exit, so that, while polling, the readings
+    still waiting to be uploaded are stored, and the buffered
+    records are written out to the backlog file and synced
+    to disk before the script stops.
+
+    Parameters:
+    ===========
+        signal_number: int
+        The number of the signal that was received.
+
+        stack_frame: frame
+        The stack frame that was interrupted.
 
     Returns:
     ========
         None
     """
-    clear_file = open(file_name, 'w+')
-    clear_file.close()
-    with open(file_name, 'w', encoding = "utf-8") as csv_file:
-        writer_object = csv.DictWriter(csv_file, fieldnames = column_names)
-        writer_object.writeheader()
-
-def is_connected(hostname: str) -> bool:
-    """ Returns True or False based on whether the host
-    was able to create a socket connection to the URL of the
-    Django app.
-    Failure in creating a socket connection implies lack of
-    a proper network connection, or an issue with the Django app
-    server, so the script shifts to "offline" mode operation.
+    sys.exit(0)
+
+def back_off_server():
+    """ Pushes back the next attempt to reach the server
+    after it could not be reached, or failed to handle
+    the readings sent to it. The wait starts at
+    `SERVER_BACKOFF_MIN` seconds and doubles with every
+    failure in a row, up to `SERVER_BACKOFF_MAX` seconds.
+    Until then, readings are only added to the backlog file.
 
     Parameters:
     ===========
-        hostname: str
-        The URL of the host to connect to, which will mostly
-        be the URL of the server the Django app is running on.
-        If need be, the IP address of a DNS server can also be
-        provided - 1.1.1.1 for example.
+        None
 
     Returns:
     ========
-        connection_status: bool
-        A Boolean object with either True or False, depending
-        on the network status.
+        None
+    """
+    global server_backoff, server_retry_time
+
+    server_backoff = min(max(server_backoff * 2, SERVER_BACKOFF_MIN), SERVER_BACKOFF_MAX)
+    server_retry_time = time.monotonic() + server_backoff
+
+def check_bulk_upload() -> bool:
+    """ Checks whether an earlier run found that the server
+    does not have the bulk upload endpoint, and if so,
+    whether it is time to try it again.
+
+    Parameters:
+    ===========
+        None
+
+    Returns:
+    ========
+        bulk_upload_supported: bool
+        False if the endpoint was found missing within
+        the last `BULK_RETRY_SECONDS`, True otherwise.
     """
-    connection_status = False
     try:
-        host = socket.gethostbyname(hostname)
-        socket_object = socket.create_connection((host, 80), 2)
-        socket_object.close()
-        connection_status = True
-        return connection_status
-    except Exception:
-        pass
-    return connection_status
+        marker_age = time.time() - os.path.getmtime(BULK_UNAVAILABLE_FILE_NAME)
+    except OSError:
+        return True
+    return marker_age >= BULK_RETRY_SECONDS
+
+def send_rows(API_URL: str, backlog_rows: list) -> int:
+    """ Sends the backlogged readings to the server
+    row by row, with one request per row, stopping at
+    the first row the server fails to handle.
+    A row the server rejects outright is logged and skipped,
+    so that it doesn't hold up every reading after it.
+    Used when the server does not provide the bulk upload
+    endpoint, and to single out the rejected rows when a
+    bulk upload is turned down.
+
+    Parameters:
+    ===========
+        API_URL: str
+        The URL of the endpoint that accepts a single
+        set of readings.
+
+        backlog_rows: list
+        The `Reading` objects, as returned by `read_backlog()`.
+
+    Returns:
+    ========
+        rows_sent: int
+        The number of rows, from the start of the list,
+        that the server either accepted or rejected.
+    """
+    rows_sent = 0
+    for row in backlog_rows:
+        post_request = SESSION.post(API_URL,
+                                    data = row._asdict(),
+                                    timeout = HTTP_TIMEOUT)
+        if post_request.status_code in REJECTED_STATUS_CODES:
+            logger.error("HTTP_REJECTED_ROW: The server answered %d to the readings taken at %s, so they were dropped: %s",
+                         post_request.status_code, row.timestamp, row._asdict())
+        elif not post_request.ok:
+            logger.error("HTTP_STATUS_ERROR: The server answered %d to the readings taken at %s.",
+                         post_request.status_code, row.timestamp)
+            break
+        rows_sent += 1
+    return rows_sent
+
+def send_backlog(SERVER_URL: str) -> bool:
+    """ Sends the readings stored in the backlog file to the
+    server, and removes the ones the server has dealt with from
+    the file. The readings are uploaded as CSV files of up to
+    `BULK_UPLOAD_SIZE` rows each to the bulk endpoint, so the
+    server can store them in a few requests, while each request
+    stays small enough to finish in time after a long outage.
+    If the server does not provide that endpoint, the script
+    falls back to sending the readings row by row, and keeps
+    doing so for `BULK_RETRY_SECONDS`. If the server turns down a bulk upload because
+    of the readings in it, that batch is sent row by row, so
+    only the rows it rejects are dropped.
+    Sending stops at the first upload the server fails to
+    handle, leaving the rest of the readings in the file for
+    the next attempt.
+    The backlog lock is only held while the file itself is
+    worked on, never while waiting on the server, so that
+    readings can still be added to the file in the meantime.
+    Those are only appended, and only this function removes
+    records, so the records being sent stay where they are.
+
+    Parameters:
+    ===========
+        SERVER_URL: str
+        The URL of the server the Django app is running on.
+
+    Returns:
+    ========
+        backlog_sent: bool
+        True if every reading in the file was dealt with,
+        False if sending stopped part way through.
+    """
+    global bulk_upload_supported
+
+    records_sent = 0
+    with backlog_lock:
+        record_count = count_backlog(get_backlog_file())
+    try:
+        while records_sent < record_count:
+            with backlog_lock:
+                backlog_rows = read_backlog(get_backlog_file(), records_sent,
+                                            min(BULK_UPLOAD_SIZE, record_count - records_sent))
+
+            if bulk_upload_supported:
+                csv_text = CSV_HEADER + ''.join(CSV_ROW_FORMAT.format(*row) for row in backlog_rows)
+                post_request = SESSION.post(SERVER_URL + "/api/bulk/",
+                                            files = {'csv': (CSV_FILE_NAME, csv_text, 'text/csv')},
+                                            timeout = BULK_HTTP_TIMEOUT)
+                if post_request.ok:
+                    records_sent += len(backlog_rows)
+                    continue
+                if post_request.status_code in (404, 405):
+                    # The server doesn't know about the bulk endpoint,
+                    # so don't bother probing it again, in this run
+                    # or the ones after it.
+                    bulk_upload_supported = False
+                    with open(BULK_UNAVAILABLE_FILE_NAME, 'w'):
+                        pass
+                    logger.warning("BULK_UPLOAD_UNAVAILABLE: Falling back to sending the readings row by row.")
+                elif post_request.status_code in REJECTED_STATUS_CODES:
+                    logger.warning("BULK_UPLOAD_REJECTED: The server answered %d, so sending this batch row by row.",
+                                   post_request.status_code)
+                else:
+                    logger.error("HTTP_STATUS_ERROR: The server answered %d to the bulk upload.",
+                                 post_request.status_code)
+                    return False
+
+            rows_sent = send_rows(SERVER_URL + "/api/", backlog_rows)
+            records_sent += rows_sent
+            if rows_sent < len(backlog_rows):
+                return False
+        return True
+    finally:
+        # Whatever happened part way through, the readings the
+        # server has already dealt with mustn't be sent again.
+        if records_sent:
+            with backlog_lock:
+                clear_backlog(records_sent)
+
+def read_readings(METER_ID: int, polling: bool = False):
+    """ Gets one set of readings from the energy meter.
+    A connection to the energy meter is created (or reused),
+    then the register values are read into a `Reading`,
+    which is packed into a record for the backlog file.
+
+    Parameters:
+    ===========
+        METER_ID: int
+        The Modbus ID of the energy meter to which each
+        Raspberry Pi is connected.
+
+        polling: bool
+        True when called from `poll_readings()`. A failed
+        serial connection is then retried on the next call,
+        instead of ending the script.
+
+    Returns:
+    ========
+        reading: tuple
+        A (timestamp, record) tuple, where the record is the
+        set of readings packed with `BACKLOG_RECORD_STRUCT`.
+        None if the registers could not be read.
+    """
+    global meter_instrument
+
+    # Read the clock just once, so the timestamp that is
+    # logged and the one stored in the record always match.
+    time_epoch = time.time()
+    time_now = time.strftime(TIMESTAMP_FORMAT, time.localtime(time_epoch))
+
+    try:
+        instrument = get_instrument(METER_ID)
+
+        # Read each block of registers in one go, then pick out
+        # the two registers belonging to each parameter.
+        block_values = [instrument.read_registers(start_address, register_count, 3)
+                        for start_address, register_count in REGISTER_BLOCKS]
+        registers = RegisterValues._make(convert_to_decimal(block_values[block_index][offset:offset + 2])
+                                         for block_index, offset in REGISTER_OFFSETS)
+
+        # Phase imbalance needs to be calculated manually, so let's
+        # do that now.
+        phase_currents = (registers.r_curr, registers.y_curr, registers.b_curr)
+        avg_current = sum(phase_currents)/3
+        max_phase_current = max(phase_currents)
+        if avg_current == 0:
+            # With no load on any phase, the phases count as balanced.
+            phase_imbalance = 1.0
+        else:
+            phase_imbalance = max_phase_current/avg_current
+
+        reading = Reading(timestamp = time_now,
+                          **registers._asdict(),
+                          phase_imbalance = phase_imbalance,
+                          meter_id = METER_ID,
+                          ip_address = get_ip())
+        return time_now, pack_reading(time_epoch, reading)
+    
+    except ModbusException as me:
+        # Covers the meter rejecting the request as well as it not
+        # answering in time, or answering with a garbled response.
+        # Either way, this set of readings is skipped.
+        logger.error("READ_ERROR: Could not read values from device registers. More details: ",
+                     exc_info = True)
+        return None
+    
+    except SerialException as se:
+        logger.error("DEVICE_CONNECT_ERROR: Could not create a connection with the device. More details: ",
+                     exc_info = True)
+        # Drop the broken connection so that a fresh one
+        # is created the next time around.
+        if meter_instrument is not None:
+            try:
+                meter_instrument.serial.close()
+            except Exception:
+                pass
+        meter_instrument = None
+        time.sleep(SERIAL_RETRY_SECONDS)
+        if not polling:
+            sys.exit(1)
+        return None
+
+def store_and_send_readings(SERVER_URL: str, readings: list, send: bool = True):
+    """ Adds the given sets of readings to the backlog file
+    locally on the Raspberry Pi storage, and then sends the
+    whole backlog over to the Django server.
+    Only one thread at a time works on the backlog file, but
+    the file is free for the other one while the backlog is
+    being sent.
+
+    Parameters:
+    ===========
+        SERVER_URL: str
+        The URL of the endpoint to which the script has to
+        send the collected set of readings.
+
+        readings: list
+        A list of (timestamp, record) tuples, as returned
+        by `read_readings()`.
+
+        send: bool
+        If False, the readings are only stored and not sent.
+
+    Returns:
+    ========
+        None
+    """
+    global server_backoff
+
+    # The current sets of readings are always added to the backlog
+    # file first, which holds any backlogged data as well.
+    with backlog_lock:
+        backlog_file = get_backlog_file()
+        for time_now, record in readings:
+            backlog_file.write(record)
+            logger.info("Added row to the file at %s.", time_now)
+
+    if send and time.monotonic() >= server_retry_time:
+        # Sending the whole backlog over to the server is also
+        # how we find out whether we are connected. If we aren't,
+        # we'll work in "offline" mode and the readings just stay
+        # in the file until the next attempt.
+        try:
+            if send_backlog(SERVER_URL):
+                server_backoff = 0
+            else:
+                back_off_server()
+        except ConnectionError as ce:
+            logger.error("HTTP_CONNECT_ERROR: Could not connect to the Django application server. More details: ",
+                         exc_info = True)
+            # The network may have come back up with a different
+            # address, so look it up again next time.
+            ip_cache['value'] = None
+            back_off_server()
+        except Timeout as te:
+            logger.error("TIMEOUT_ERROR: The request to the server timed out. More details: ",
+                         exc_info = True)
+            back_off_server()
+        except RequestException as rqe:
+            logger.error("HTTP_REQUEST_ERROR: The request to the server failed. More details: ",
+                         exc_info = True)
+            back_off_server()
 
 def get_and_send_readings(SERVER_URL: str, METER_ID: int):
     """ The main code snippet that gets the readings from
     the energy meter and sends it over to the Django server.
-    A connection to the energy meter is created, then the register
-    values are read. Each set of readings is stored as a row in the
-    CSV file locally on the Raspberry Pi storage.
+    Each set of readings is stored as a record in the
+    backlog file locally on the Raspberry Pi storage.
 
     Parameters:
     ===========
@@ -278,152 +1118,127 @@ def get_and_send_readings(SERVER_URL: str, METER_ID: int):
     ========
         None
     """
-    API_URL = SERVER_URL + "/api/"
-    
-    values_list = []
-    values_dict = {}
+    reading = read_readings(METER_ID)
+    if reading is not None:
+        store_and_send_readings(SERVER_URL, [reading])
 
-    # Initialise the dictionary object
-    # with None values.
-    for parameter in PARAMETER_NAME_LIST:
-        values_dict[parameter] = None
+def upload_readings(SERVER_URL: str, reading_queue: queue.Queue):
+    """ Runs in a background thread while polling, taking
+    sets of readings off the queue and storing and sending
+    them, so that a slow server never holds up the next
+    read from the energy meter.
+    Readings that arrive close together are handled as one
+    batch, of up to `UPLOAD_BATCH_SIZE` sets.
 
-    time_now = time.strftime('%Y-%m-%d %H:%M:%S')
-    values_list.append(time_now)
+    Parameters:
+    ===========
+        SERVER_URL: str
+        The URL of the endpoint to which the script has to
+        send the collected set of readings.
+
+        reading_queue: queue.Queue
+        The queue the readings are put on by `poll_readings()`.
+        A None on the queue tells the uploader to stop.
+
+    Returns:
+    ========
+        None
+    """
+    while True:
+        readings = [reading_queue.get()]
+        batch_deadline = time.monotonic() + UPLOAD_BATCH_SECONDS
+        while readings[-1] is not None and len(readings) < UPLOAD_BATCH_SIZE:
+            time_left = batch_deadline - time.monotonic()
+            if time_left <= 0:
+                break
+            try:
+                readings.append(reading_queue.get(timeout = time_left))
+            except queue.Empty:
+                break
+
+        stopping = readings[-1] is None
+        if stopping:
+            readings.pop()
+
+        # Keep the uploader running whatever goes wrong with one
+        # batch, or the readings would pile up on the queue.
+        try:
+            # When `poll_readings()` is stopping, just store
+            # whatever is left and let it know we're done.
+            store_and_send_readings(SERVER_URL, readings, send = not stopping)
+        except Exception:
+            logger.error("UPLOAD_ERROR: Could not store or send a batch of readings. More details: ",
+                         exc_info = True)
+        if stopping:
+            return
+
+def poll_readings(SERVER_URL: str, METER_ID: int, POLL_INTERVAL: float):
+    """ Takes a set of readings every `POLL_INTERVAL` seconds,
+    for as long as the script runs.
+    The readings are scheduled against a monotonic clock, so
+    the time taken to read each set doesn't push the next one
+    back. If a set takes longer than the interval, the missed
+    slots are skipped instead of being caught up on all at once.
+    Storing and sending the readings is handed over to a
+    background thread through a queue.
+
+    Parameters:
+    ===========
+        SERVER_URL: str
+        The URL of the endpoint to which the script has to
+        send the collected set of readings.
+
+        METER_ID: int
+        The Modbus ID of the energy meter to which each
+        Raspberry Pi is connected.
+
+        POLL_INTERVAL: float
+        The time in seconds between two sets of readings.
+
+    Returns:
+    ========
+        None
+    """
+    reading_queue = queue.Queue(maxsize = UPLOAD_QUEUE_SIZE)
+    uploader = threading.Thread(target = upload_readings,
+                                args = (SERVER_URL, reading_queue),
+                                name = 'uploader',
+                                daemon = True)
+    uploader.start()
 
     try:
-        # Let's specify the connection parameters to connect to the
-        # energy meter and then configure it.
-        instrument = minimalmodbus.Instrument('/dev/ttyUSB0', METER_ID, minimalmodbus.MODE_RTU)
-        instrument.serial.baudrate = 9600
-        instrument.serial.bytesize = 8
-        instrument.serial.parity = serial.PARITY_NONE
-        instrument.serial.stopbits = 2
-        instrument.serial.timeout = 1
-
-        for i in range(0, len(REGISTER_LIST)):
-            # Read the value of each required register sequentially
-            # and then store it in the list.
-            register_value_binary = instrument.read_registers(REGISTER_LIST[i], 2, 3)
-            actual_value = convert_to_decimal(register_value_binary)
-            values_list.append(actual_value)
+        next_tick = time.monotonic()
+        while True:
+            reading = read_readings(METER_ID, polling = True)
+            if reading is not None:
+                try:
+                    reading_queue.put_nowait(reading)
+                except queue.Full:
+                    # The uploader has fallen far behind, so write
+                    # the readings straight to the backlog file.
+                    logger.warning("UPLOAD_QUEUE_FULL: Storing the readings without sending them.")
+                    store_and_send_readings(SERVER_URL, [reading], send = False)
 
-        # Phase imbalance needs to be calculated manually, so let's
-        # do that now.
-        r_current = values_list[5]
-        y_current = values_list[6]
-        b_current = values_list[7]
-
-        avg_current = (r_current + y_current + b_current)/3
-        max_phase_current = max(r_current, y_current, b_current)
-        phase_imbalance = max_phase_current/avg_current
-
-        ip_address = get_ip()
-
-        values_list.append(phase_imbalance)
-        values_list.append(METER_ID)
-        values_list.append(ip_address)
-
-        # Zip the parameter names (keys) and the register values (values)
-        # into a different dictionary.
-        final_dict = dict(zip(values_dict, values_list))
-
-        if not is_connected(SERVER_URL):
-            # Check if we are able to create a socket connection to the
-            # Django app. If we aren't able to connect, we'll work
-            # in "offline" mode - append the readings to the CSV file.
-            with open(CSV_FILE_NAME, 'a+', encoding = "utf-8") as csv_file:
-                writer_object = csv.DictWriter(csv_file, fieldnames = PARAMETER_NAME_LIST)
-                writer_object.writerow(final_dict)
+            next_tick += POLL_INTERVAL
+            time_now = time.monotonic()
+            if time_now > next_tick:
+                missed_ticks = (time_now - next_tick) // POLL_INTERVAL + 1
+                next_tick += missed_ticks * POLL_INTERVAL
+            time.sleep(next_tick - time_now)
+    finally:
+        # Don't lose the readings still waiting on the queue
+        # when the script is stopped. The uploader stores them
+        # once it reaches the None at the end of the queue, or
+        # if it is no longer running, we store them ourselves.
+        if uploader.is_alive():
+            reading_queue.put(None)
+            uploader.join()
         else:
-            # In this case, we `are` connected, and the current set of
-            # readings (and any backlogged data in the CSV file) can
-            # be sent to the server.
-            #
-            # So we'll add our current set of readings to the CSV
-            # file first.
-            with open(CSV_FILE_NAME, 'a+', encoding = "utf-8") as csv_file:
-                writer_object = csv.DictWriter(csv_file, fieldnames = PARAMETER_NAME_LIST)
-                writer_object.writerow(final_dict)
-            # Then, we open the CSV file and send the data
-            # within it to the server, row by row.
-            with open(CSV_FILE_NAME, 'r') as csv_file:
-                reader_object = csv.DictReader(csv_file)
-                for row in reader_object:
-                    final_dict['timestamp'] = row['timestamp']
-
-                    final_dict['r_vtg'] = row['r_vtg']
-                    final_dict['y_vtg'] = row['y_vtg']
-                    final_dict['b_vtg'] = row['b_vtg']
-
-                    final_dict['r_curr'] = row['r_curr']
-                    final_dict['y_curr'] = row['y_curr']
-                    final_dict['b_curr'] = row['b_curr']
-                    
-                    final_dict['r_active_curr'] = row['r_active_curr']
-                    final_dict['y_active_curr'] = row['y_active_curr']
-                    final_dict['b_active_curr'] = row['b_active_curr']
-
-                    final_dict['r_reactive_curr'] = row['r_reactive_curr']
-                    final_dict['y_reactive_curr'] = row['y_reactive_curr']
-                    final_dict['b_reactive_curr'] = row['b_reactive_curr']
-
-                    final_dict['r_pf'] = row['r_pf']
-                    final_dict['y_pf'] = row['y_pf']
-                    final_dict['b_pf'] = row['b_pf']
-
-                    final_dict['r_active_pwr'] = row['r_active_pwr']
-                    final_dict['y_active_pwr'] = row['y_active_pwr']
-                    final_dict['b_active_pwr'] = row['b_active_pwr']
-
-                    final_dict['r_react_pwr'] = row['r_react_pwr']
-                    final_dict['y_react_pwr'] = row['y_react_pwr']
-                    final_dict['b_react_pwr'] = row['b_react_pwr']
-
-                    final_dict['r_apparent_pwr'] = row['r_apparent_pwr']
-                    final_dict['y_apparent_pwr'] = row['y_apparent_pwr']
-                    final_dict['b_apparent_pwr'] = row['b_apparent_pwr']
-
-                    final_dict['r_vtg_thd'] = row['r_vtg_thd']
-                    final_dict['y_vtg_thd'] = row['y_vtg_thd']
-                    final_dict['b_vtg_thd'] = row['b_vtg_thd']
-
-                    final_dict['r_curr_thd'] = row['r_curr_thd']
-                    final_dict['y_curr_thd'] = row['y_curr_thd']
-                    final_dict['b_curr_thd'] = row['b_curr_thd']
-
-                    final_dict['abs_active_energy'] = row['abs_active_energy']
-                    final_dict['total_energy_imp'] = row['total_energy_imp']
-                    final_dict['phase_imbalance'] = row['phase_imbalance']
-
-                    final_dict['meter_id'] = row['meter_id']
-                    final_dict['ip_address'] = row['ip_address']
-
-                    post_request = requests.post(API_URL, data = final_dict)
-            # Once all the rows in the CSV file have been
-            # sent over, we call `clear_csv()` to truncate
-            # the CSV file without losing its column names/headers.
-            clear_csv(CSV_FILE_NAME, PARAMETER_NAME_LIST)
-        logging.info(f"""Added row to the file at {time_now}.""")
-    
-    except IllegalRequestError as ire:
-        logging.error("""READ_ERROR: Could not read values from
-        device registers. More details: """, exc_info = 1)
-    
-    except SerialException as se:
-        logging.error("""DEVICE_CONNECT_ERROR: Could not create a
-        connection with the device. More details: """, exc_info = 1)
-        time.sleep(10)
-        sys.exit(1)
-    
-    except ConnectionError as ce:
-        logging.error("""HTTP_CONNECT_ERROR: Could not connect to
-        the Django application server. More details: """, exc_info = 1)
-        time.sleep(10)
-    
-    except Timeout as te:
-        logging.error("""TIMEOUT_ERROR: The request to the server
-        timed out. More details: """, exc_info = 1)
+            readings = []
+            while not reading_queue.empty():
+                readings.append(reading_queue.get_nowait())
+            if readings:
+                store_and_send_readings(SERVER_URL, readings, send = False)
 
 if __name__ == '__main__':
     # A quick sanity check to see if the log file
@@ -443,21 +1258,22 @@ if __name__ == '__main__':
                                             errors = None)
 
     logging.basicConfig(handlers = [rotating_handler],
-                        format = """%(asctime)s - %(name)s -
-                        %(levelname)s - %(message)s""",
+                        format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
                         datefmt = '%Y-%m-%d %H:%M:%S',
                         level = logging.DEBUG)
-    
-    logger = logging.getLogger(__name__)
 
-    # A quick sanity check to see if the CSV
-    # file that will hold all the readings exists.
-    # If not, we'll create it with the headers
-    # in place.
-    if not os.path.exists(CSV_FILE_NAME):
-        with open(CSV_FILE_NAME, 'w', encoding = "utf-8") as csv_file:
-            writer_object = csv.DictWriter(csv_file, fieldnames = PARAMETER_NAME_LIST)
-            writer_object.writeheader()
+    # Make sure any readings waiting to be uploaded reach the
+    # backlog file if the script is stopped part way through.
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    # If an older version of this script left readings
+    # behind in the CSV file, move them over to the
+    # backlog file so they still get sent.
+    migrate_csv_backlog()
+
+    # Don't probe the bulk upload endpoint on every run
+    # if an earlier one found the server doesn't have it.
+    bulk_upload_supported = check_bulk_upload()
     
     # Load the configuration details from the `config.toml` file.
     # This file contains details about the URL of the Django server
@@ -468,7 +1284,14 @@ if __name__ == '__main__':
     METER_ID = int(config["meter_id"])
     SERVER_URL = config["server_url"]
     API_URL = SERVER_URL + "/api/"
+
+    # `poll_interval` is optional. Without it, the script takes
+    # a single set of readings and exits, as when run from cron.
+    POLL_INTERVAL = float(config.get("poll_interval", 0))
     
     # With the initial configuration done,
     # let's call the main loop
-    get_and_send_readings(SERVER_URL, METER_ID)
\ No newline at end of file
+    if POLL_INTERVAL > 0:
+        poll_readings(SERVER_URL, METER_ID, POLL_INTERVAL)
+    else:
+        get_and_send_readings(SERVER_URL, METER_ID)